@@ -2,7 +2,7 @@
 # temperature_plot_with_hover.py
 #
 # Functionality:
-#   - Reads "Time" and "Temperature" columns from a Numbers file;
+#   - Reads "Time" and "Temperature" columns from a Numbers or xlsx file;
 #   - Plots a time series line chart of temperature:
 #       • Major ticks every 30 minutes;
 #       • Red dashed line at 00:00 each day;
@@ -14,143 +14,337 @@
 #   python3 temperature_plot_with_hover.py blank.numbers
 
 import sys
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import numpy as np
-import matplotlib
-matplotlib.use('TkAgg')  # Use TkAgg backend for interactivity
+import time
+from dataclasses import dataclass
 
-from numbers_parser import Document
+# numpy, pandas, matplotlib, numbers_parser and numba are imported lazily
+# inside the functions that need them: a cold start (or a usage error) no
+# longer waits ~1-2 s for libraries the argv check never touches
+
+
+def _slopes_numpy(t_sec, y, out):
+    import numpy as np
+
+    # Vectorized central difference; endpoints use one-sided differences
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[1:-1] = (y[2:] - y[:-2]) / ((t_sec[2:] - t_sec[:-2]) / 3600.0)
+        out[0] = (y[1] - y[0]) / ((t_sec[1] - t_sec[0]) / 3600.0)
+        out[-1] = (y[-1] - y[-2]) / ((t_sec[-1] - t_sec[-2]) / 3600.0)
+    out[~np.isfinite(out)] = 0.0  # duplicate timestamps -> zero slope
+
+
+def _slopes_loop(t_sec, y, out):
+    # Single fused pass: no temporaries, half the memory traffic of
+    # the NumPy version for large sheets; JIT-compiled on first use
+    n = y.shape[0]
+    for i in range(1, n - 1):
+        dt = (t_sec[i + 1] - t_sec[i - 1]) / 3600.0
+        out[i] = (y[i + 1] - y[i - 1]) / dt if dt != 0.0 else 0.0
+    dt = (t_sec[1] - t_sec[0]) / 3600.0
+    out[0] = (y[1] - y[0]) / dt if dt != 0.0 else 0.0
+    dt = (t_sec[n - 1] - t_sec[n - 2]) / 3600.0
+    out[n - 1] = (y[n - 1] - y[n - 2]) / dt if dt != 0.0 else 0.0
+
+
+_slopes_impl = None
+
+
+def _slopes(t_sec, y, out):
+    global _slopes_impl
+    if _slopes_impl is None:
+        try:
+            from numba import njit
+        except ImportError:
+            _slopes_impl = _slopes_numpy
+        else:
+            _slopes_impl = njit(cache=True, fastmath=True)(_slopes_loop)
+    _slopes_impl(t_sec, y, out)
+
+
+# Plot constants shared across main() calls: the tick array is built once,
+# and the locator/formatter carry internal caches that benefit from reuse.
+# Initialized lazily so importing this module stays matplotlib-free.
+_YTICKS = None
+_MAJOR_LOC = None
+_MAJOR_FMT = None
+
+
+def _init_plot_constants():
+    global _YTICKS, _MAJOR_LOC, _MAJOR_FMT
+    if _YTICKS is not None:
+        return
+    import numpy as np
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+    plt.rcParams["font.sans-serif"] = ["Arial Unicode MS"]
+    plt.rcParams["axes.unicode_minus"] = False
+    plt.rcParams["path.simplify"] = True
+    plt.rcParams["path.simplify_threshold"] = 1.0
+    _YTICKS = np.arange(18, 32.1, 0.5)
+    _MAJOR_LOC = mdates.MinuteLocator(interval=30)
+    _MAJOR_FMT = mdates.DateFormatter("%H:%M")
 
 
 def find_header_row(rows, max_scan=10):
+    # One pass per candidate row, recording both column indices directly
+    # instead of rescanning the row with any()/index()/next() afterwards
     for i in range(min(max_scan, len(rows))):
-        texts = [(c.value.strip() if c and isinstance(c.value, str) else c.value) for c in rows[i]]
-        if any(t == "时间" for t in texts if isinstance(t, str)) and any("温度" in t for t in texts if isinstance(t, str)):
-            return i, texts
-    return None, None
+        idx_time = idx_temp = -1
+        for j, c in enumerate(rows[i]):
+            v = c.value if c else None
+            if isinstance(v, str):
+                s = v.strip()
+                if s == "时间":
+                    idx_time = j
+                elif "温度" in s:
+                    idx_temp = j
+        if idx_time >= 0 and idx_temp >= 0:
+            return i, idx_time, idx_temp
+    return None, None, None
 
 
 def read_numbers(path):
+    import pandas as pd
+
+    if path.endswith(".xlsx"):
+        # openpyxl's C-optimized reader loads columns straight into arrays,
+        # skipping numbers_parser's per-cell Python row objects
+        raw = pd.read_excel(path, engine="openpyxl")
+        time_col = next((c for c in raw.columns if isinstance(c, str) and c.strip() == "时间"), None)
+        temp_col = next((c for c in raw.columns if isinstance(c, str) and "温度" in c), None)
+        if time_col is None or temp_col is None:
+            raise RuntimeError('Header row containing "时间" and "温度" not found.')
+        df = raw[[time_col, temp_col]].rename(columns={time_col: "Time", temp_col: "Temperature"})
+        if df.empty:
+            raise RuntimeError("No data rows found.")
+        return df
+
+    from numbers_parser import Document
+
     doc = Document(path)
     sheet = doc.sheets[0]
     table = sheet.tables[0]
     rows = table.rows()
-    header_idx, headers = find_header_row(rows)
+    header_idx, idx_time, idx_temp = find_header_row(rows)
     if header_idx is None:
         raise RuntimeError('Header row containing "时间" and "温度" not found.')
-    idx_time = headers.index("时间")
-    idx_temp = next(i for i, h in enumerate(headers) if isinstance(h, str) and "温度" in h)
-    data = []
-    for r in rows[header_idx + 1:]:
-        if r[idx_time] and r[idx_temp]:
-            data.append((r[idx_time].value, r[idx_temp].value))
-    if not data:
+    # Extract each column in bulk; pandas ingests columnar lists directly
+    # instead of iterating a list of row tuples
+    body = rows[header_idx + 1:]
+    times = [r[idx_time].value for r in body if r[idx_time] and r[idx_temp]]
+    temps = [r[idx_temp].value for r in body if r[idx_time] and r[idx_temp]]
+    if not times:
         raise RuntimeError("No data rows found.")
-    return pd.DataFrame(data, columns=["Time", "Temperature"])
+    return pd.DataFrame({"Time": times, "Temperature": temps})
 
 
 def format_annotation(ts, temp, slope):
     return f"{ts.strftime('%Y-%m-%d %H:%M:%S')}\nTemp: {temp:.1f}°C\nSlope: {slope:+.2f} °C/h"
 
 
+@dataclass(slots=True)
+class Series:
+    # Struct-of-arrays view of the loaded data: everything the plot and
+    # hover path needs, with no per-event pandas access
+    times: "np.ndarray"   # datetime64[ns], sorted ascending
+    temps: "np.ndarray"   # float64, same order as times
+    slopes: "np.ndarray"  # °C/hour, central differences
+    labels: list          # preformatted annotation text per sample
+
+
+def prepare_series(df):
+    import numpy as np
+    import pandas as pd
+
+    df = df.dropna().copy()
+    # Pick the parser by inspecting one value, instead of letting the strict
+    # format raise after a wasted full pass over non-matching data. 年-style
+    # strings that still miss the strict format (seconds, unpadded fields)
+    # keep the baseline fallback to the generic parser
+    sample = next((v for v in df["Time"].values if v is not None), None)
+    if isinstance(sample, str) and "年" in sample:
+        try:
+            df["Time"] = pd.to_datetime(df["Time"], format="%Y年%m月%d日 %H:%M")
+        except ValueError:
+            df["Time"] = pd.to_datetime(df["Time"])
+    else:
+        df["Time"] = pd.to_datetime(df["Time"])
+    # Numbers usually hands us floats already; only walk the string path
+    # (strip a trailing "°C") when the column actually holds objects
+    col = df["Temperature"]
+    if col.dtype == object:
+        temps = np.fromiter(
+            (float(v.rstrip("°C ")) if isinstance(v, str) else float(v) for v in col.values),
+            np.float64, count=len(col))
+    else:
+        temps = col.to_numpy(dtype=np.float64, copy=False)
+    # Sort via argsort on the underlying arrays: everything downstream works
+    # on times/temps, so there is no need to copy the whole DataFrame into
+    # sorted order
+    times = df["Time"].values.astype("datetime64[ns]")
+    order = np.argsort(times, kind="stable")
+    times = times[order]
+    temps = temps[order]
+
+    # Precompute slopes (°C/hour) once with a central-difference kernel,
+    # so each hover event is an O(1) array lookup instead of pandas .iloc calls.
+    # The kernels index y[1]/t_sec[n-2] unconditionally, so fewer than two
+    # samples (slope undefined) must not reach them
+    t_sec = times.astype("datetime64[s]").astype(np.int64)
+    if temps.shape[0] >= 2:
+        slopes = np.empty_like(temps)
+        _slopes(t_sec, temps, slopes)
+    else:
+        slopes = np.zeros_like(temps)
+
+    # Preformat the annotation text per sample: strftime and f-string work
+    # happen once here instead of on every hover event
+    labels = [format_annotation(ts, t, s)
+              for ts, t, s in zip(pd.DatetimeIndex(times), temps, slopes)]
+    return Series(times=times, temps=temps, slopes=slopes, labels=labels)
+
+
 def main():
     if len(sys.argv) != 2:
-        print(f"Usage: {sys.argv[0]} <path to .numbers file>")
+        print(f"Usage: {sys.argv[0]} <path to .numbers or .xlsx file>")
         sys.exit(1)
     path = sys.argv[1]
 
+    # Kick off the Numbers parse on a worker thread so it overlaps the
+    # matplotlib import — the two largest startup latencies here. The GIL
+    # is released during numbers-parser's zip/xml reads, so real overlap
+    # occurs.
+    from concurrent.futures import ThreadPoolExecutor
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(read_numbers, path)
+
+    import numpy as np
+    import pandas as pd
+    import matplotlib
+    matplotlib.use('TkAgg')  # Use TkAgg backend for interactivity
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+
     # Read and preprocess data
-    df = read_numbers(path)
-    df = df.dropna().copy()
-    try:
-        df["Time"] = pd.to_datetime(df["Time"], format="%Y年%m月%d日 %H:%M")
-    except:
-        df["Time"] = pd.to_datetime(df["Time"])
-    df["Temperature"] = df["Temperature"].astype(str).str.replace("°C", "", regex=False).astype(float)
-    df = df.sort_values("Time").reset_index(drop=True)
+    series = prepare_series(future.result())
+    executor.shutdown(wait=False)
+    x_dates = pd.DatetimeIndex(series.times)
+    labels = series.labels
 
     # Plotting settings
-    plt.rcParams["font.sans-serif"] = ["Arial Unicode MS"]
-    plt.rcParams["axes.unicode_minus"] = False
+    _init_plot_constants()
 
     fig, ax = plt.subplots(figsize=(12, 6))
-    x_dates = df["Time"]
-    y = df["Temperature"]
+    y = series.temps
     x = mdates.date2num(x_dates)
-    line = ax.plot(x, y, '-o', color="tab:blue", picker=5)[0]
+    # Markers live on the line with markevery so long logs draw at most
+    # ~2000 of them; the scatter underneath renders nothing (no face/edge
+    # color) but keeps every point pickable. PathCollection.contains has a
+    # fast broad-phase, unlike the per-vertex Python checks Line2D.contains
+    # runs on every mouse move.
+    markevery = max(1, len(x) // 2000)
+    line = ax.plot(x, y, '-o', color="tab:blue", markevery=markevery)[0]
+    points = ax.scatter(x, y, s=36, facecolors="none", edgecolors="none",
+                        picker=True, pickradius=5, zorder=3)
 
     # Axis settings
     ax.set_ylim(17, 33)
-    ax.set_yticks(np.arange(18, 32.1, 0.5))
+    ax.set_yticks(_YTICKS)
     ax.set_ylabel("Temperature (°C)")
     tmin, tmax = x.min(), x.max()
     ax.set_xlim(tmin, tmax)
-    ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=30))
-    ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+    ax.xaxis.set_major_locator(_MAJOR_LOC)
+    ax.xaxis.set_major_formatter(_MAJOR_FMT)
     plt.xticks(rotation=45)
 
-    # Red dashed line at 00:00 each day
-    dates = df["Time"].dt.date.unique()
-    for d in dates:
-        mid = pd.to_datetime(f"{d} 00:00:00")
-        num = mdates.date2num(mid)
-        if tmin <= num <= tmax:
-            ax.axvline(num, color="red", linewidth=2, linestyle="--")
+    # Red dashed line at 00:00 each day — one LineCollection instead of
+    # one Line2D artist per day, so every redraw touches a single artist
+    midnights = mdates.date2num(x_dates.normalize().unique())
+    mask = (midnights >= tmin) & (midnights <= tmax)
+    ax.vlines(midnights[mask], 17, 33, colors="red", linewidth=2, linestyles="--")
 
-    # Centered date labels above x-axis
+    # Centered date labels above x-axis — aggregate first/last per day in one
+    # pass instead of materializing a sub-DataFrame per group
     y_label_pos = 18.2
-    for d, group in df.groupby(df["Time"].dt.date):
-        start = mdates.date2num(group["Time"].iloc[0])
-        end = mdates.date2num(group["Time"].iloc[-1])
-        mid = start + (end - start) / 2
+    spans = pd.Series(x_dates).groupby(x_dates.date).agg(["first", "last"])
+    starts = mdates.date2num(spans["first"])
+    ends = mdates.date2num(spans["last"])
+    mids = starts + (ends - starts) / 2
+    for d, mid in zip(spans.index, mids):
         ax.text(mid, y_label_pos, d.strftime("%Y-%m-%d"), ha="center", va="bottom", fontsize=9, backgroundcolor="white", clip_on=True)
 
     # Annotation box setup
     annot = ax.annotate("", xy=(0, 0), xytext=(10, 10), textcoords="offset points",
                         bbox=dict(boxstyle="round,pad=0.5", fc="w", ec="gray"),
                         arrowprops=dict(arrowstyle="->"))
+    annot.get_bbox_patch().set_alpha(0.9)  # set once, not per hover event
     annot.set_visible(False)
+    annot.set_animated(True)  # excluded from full draws; blitted manually
 
-    def compute_slope(idx):
-        # Estimate slope (°C/hour) using central difference
-        if idx <= 0:
-            idx0, idx1 = 0, 1
-        elif idx >= len(df) - 1:
-            idx0, idx1 = len(df) - 2, len(df) - 1
-        else:
-            idx0, idx1 = idx - 1, idx + 1
-        t0 = df["Time"].iloc[idx0]
-        t1 = df["Time"].iloc[idx1]
-        y0 = df["Temperature"].iloc[idx0]
-        y1 = df["Temperature"].iloc[idx1]
-        hours = (t1 - t0).total_seconds() / 3600
-        if hours == 0:
-            return 0.0
-        return (y1 - y0) / hours
-
-    def update_annot(ind):
-        idx = ind["ind"][0]
-        xx = x[idx]
-        yy = y.iloc[idx]
-        slope = compute_slope(idx)
-        annot.xy = (xx, yy)
-        txt = format_annotation(x_dates.iloc[idx], yy, slope)
-        annot.set_text(txt)
-        annot.get_bbox_patch().set_alpha(0.9)
+    # Blit support: cache the rendered axes (line, vlines, labels, ticks)
+    # and repaint only the annotation on hover instead of the whole canvas.
+    # The same draw hook caches the points' pixel coordinates for hover-time
+    # distance checks: distances must be measured in pixel space (data-space
+    # mixes date-number days with °C), and pixel magnitudes are small enough
+    # that a half-size float32 copy loses nothing
+    background = [None]
+    xy_px = [None]
+
+    def on_draw(event):
+        background[0] = fig.canvas.copy_from_bbox(ax.bbox)
+        xy_px[0] = ax.transData.transform(np.column_stack([x, y])).astype(np.float32)
+
+    def on_resize(event):
+        background[0] = None  # stale after resize; next draw recaptures
+
+    fig.canvas.mpl_connect("draw_event", on_draw)
+    fig.canvas.mpl_connect("resize_event", on_resize)
+
+    def redraw_annot():
+        if background[0] is None:
+            fig.canvas.draw_idle()
+            return
+        fig.canvas.restore_region(background[0])
+        if annot.get_visible():
+            ax.draw_artist(annot)
+        fig.canvas.blit(ax.bbox)
+
+    def update_annot(idx):
+        # Position + preformatted text only: no bbox restyling, no
+        # per-event formatting work
+        annot.xy = (x[idx], y[idx])
+        annot.set_text(labels[idx])
+
+    # Throttle to ~60 Hz and skip redraws when the hovered point is unchanged,
+    # so dense mouse-move streams don't saturate the GUI thread
+    last_hover = {"t": 0.0, "idx": -1}
 
     def hover(event):
-        if event.inaxes == ax:
-            cont, ind = line.contains(event)
-            if cont:
-                update_annot(ind)
-                annot.set_visible(True)
-                fig.canvas.draw_idle()
+        now = time.monotonic()
+        if now - last_hover["t"] < 0.016:
+            return
+        last_hover["t"] = now
+        if event.inaxes != ax:
+            return
+        cont, ind = points.contains(event)
+        if cont:
+            cand = ind["ind"]
+            if len(cand) > 1 and xy_px[0] is not None:
+                dx = xy_px[0][cand, 0] - np.float32(event.x)
+                dy = xy_px[0][cand, 1] - np.float32(event.y)
+                idx = cand[np.argmin(dx * dx + dy * dy)]
             else:
-                if annot.get_visible():
-                    annot.set_visible(False)
-                    fig.canvas.draw_idle()
+                idx = cand[0]
+            if idx == last_hover["idx"] and annot.get_visible():
+                return
+            last_hover["idx"] = idx
+            update_annot(idx)
+            annot.set_visible(True)
+            redraw_annot()
+        elif annot.get_visible():
+            last_hover["idx"] = -1
+            annot.set_visible(False)
+            redraw_annot()
 
     fig.canvas.mpl_connect("motion_notify_event", hover)
 